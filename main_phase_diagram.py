@@ -38,4 +38,5 @@ if __name__ == "__main__":
 
     plotter = Plotter(paths, VARIABLES, TICKS_STEPS)
     plotter.data = data_manager.data
+    plotter.palette = data_manager.palette
     plotter.plot_phase_diagram()
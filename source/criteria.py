@@ -6,6 +6,159 @@ utilizado para realizar diagramas de fases
 
 import numpy as np
 
+# Fases detectadas por los mapas de color, cada una indexa su color en _PHASE_COLORS
+_PHASE_RANDOM = 0
+_PHASE_NO_CRITERIA = 1
+_PHASE_ANTIFERRO_LOCAL = 2
+_PHASE_Z_ALIGNED = 3
+_PHASE_XY_ALIGNED = 4
+_PHASE_FERRO_LOCAL = 5
+_PHASE_FERRO_Z = 6
+_PHASE_ANTIFERRO_Z = 7
+_PHASE_FERRO_XY = 8
+_PHASE_ANTIFERRO_XY = 9
+_PHASE_FERRO_DOMAIN_WALL = 10
+_PHASE_ANTIFERRO_DOMAIN_WALL = 11
+_PHASE_GLOBALLY_CONICAL = _PHASE_XY_ALIGNED
+_PHASE_LOCALLY_CONICAL = _PHASE_FERRO_LOCAL
+
+# Colores RGB de cada fase, los mapas de color retornan una fila de la tabla
+_PHASE_COLORS = np.array([
+    [0, 0, 0],          # paramagnetismo, negro
+    [255, 255, 255],    # sin criterio, blanco
+    [113, 255, 240],    # cian
+    [194, 255, 113],    # verde claro
+    [177, 113, 255],    # lavanda
+    [255, 113, 113],    # rojo claro
+    [255, 231, 113],    # amarillo
+    [113, 255, 133],    # verde
+    [255, 113, 180],    # rosa
+    [113, 193, 255],    # celeste oscuro
+    [255, 150, 113],    # pared de dominio ferro
+    [50, 194, 78],      # pared de dominio antiferro
+], dtype=np.float32) / np.float32(255.)
+_PHASE_COLORS.setflags(write=False)
+
+
+def _spread_bits(values):
+    """
+    Intercala dos ceros entre cada uno de los 21 bits menos significativos de los enteros.
+
+    Parámetros:
+    -----------
+    values : ndarray
+        array de enteros no negativos.
+
+    Retorna:
+    --------
+    ndarray
+        array de uint64 con los bits separados, listo para formar claves de Morton.
+    """
+    v = values.astype(np.uint64) & np.uint64(0x1fffff)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x100f00f00f00f00f)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x10c30c30c30c30c3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return v
+
+
+def _morton_order(positions):
+    """
+    Ordena los átomos según la curva de Morton (orden Z) de sus posiciones, de modo
+    que átomos cercanos en el espacio queden cercanos en memoria.
+
+    Parámetros:
+    -----------
+    positions : ndarray
+        array de N*3 con las posiciones de los átomos.
+
+    Retorna:
+    --------
+    ndarray
+        array de N índices, el átomo n del nuevo orden es el átomo order[n] original.
+    """
+    # Discretizamos las posiciones en una grilla de 2**21 celdas por eje
+    origin = positions.min(axis=0)
+    extent = float(np.max(np.ptp(positions, axis=0)))
+    scale = (2**21 - 1) / extent if extent > 0. else 0.
+    cells = ((positions - origin) * scale).astype(np.uint64)
+
+    keys = (_spread_bits(cells[:, 0])
+            | (_spread_bits(cells[:, 1]) << np.uint64(1))
+            | (_spread_bits(cells[:, 2]) << np.uint64(2)))
+
+    return np.argsort(keys, kind="stable")
+
+
+def _cluster_vectors(vectors, tol):
+    """
+    Agrupa los vectores que distan menos de tol de un mismo vector representativo.
+
+    Parámetros:
+    -----------
+    vectors : ndarray
+        array de n*3 con los vectores a agrupar.
+    tol : float
+        Distancia máxima entre un vector y el representativo de su grupo.
+
+    Retorna:
+    --------
+    tuple
+        (ndarray, int): índice del grupo de cada vector y número de grupos.
+    """
+    labels = np.full(len(vectors), -1, dtype=np.int32)
+    n_groups = 0
+
+    # El primer vector sin grupo es el representativo del siguiente grupo
+    unassigned = np.flatnonzero(labels < 0)
+    while unassigned.size:
+        diff = vectors[unassigned] - vectors[unassigned[0]]
+        close = np.einsum('ij,ij->i', diff, diff) < tol**2
+        labels[unassigned[close]] = n_groups
+        n_groups += 1
+        unassigned = unassigned[~close]
+
+    return labels, n_groups
+
+
+def _orient_and_sum(vectors, max_iter=10):
+    """
+    Busca los signos de los vectores que maximizan la norma de su suma.
+
+    Cada vector se usa como eje inicial, se invierten los vectores que apuntan en
+    sentido opuesto al eje y la suma resultante pasa a ser el nuevo eje, hasta que
+    los signos no cambian (o max_iter iteraciones). Con n vectores el costo es
+    O(max_iter * n**2), en lugar de probar las 2**n combinaciones de signos.
+
+    Parámetros:
+    -----------
+    vectors : ndarray
+        array de n*3 con los vectores a sumar.
+    max_iter : int
+        Número máximo de iteraciones.
+
+    Retorna:
+    --------
+    ndarray
+        vector de 3 elementos con la suma de mayor norma encontrada.
+    """
+    vectors = vectors[np.einsum('ij,ij->i', vectors, vectors) > 0.]
+    if len(vectors) == 0:
+        return np.zeros(3)
+
+    axes = vectors
+    signs = None
+    for _ in range(max_iter):
+        new_signs = np.where(axes @ vectors.T < 0., -1., 1.)
+        if signs is not None and np.array_equal(new_signs, signs):
+            break
+        signs = new_signs
+        axes = signs @ vectors
+
+    return axes[np.argmax(np.einsum('ij,ij->i', axes, axes))]
+
+
 class Criteria:
     """
     Clase para determinar diferentes criterios de alineación de espines en un sistema de redes.
@@ -17,17 +170,74 @@ class Criteria:
     vecinos : ndarray
         array conteniendo los vecinos más cercanos para cada átomo.
     sublattice : ndarray
-        array que indica la subred a la que pertenece cada átomo.
+        array de int8 que indica la subred (+-1) a la que pertenece cada átomo.
     positions : ndarray
         array de posiciones de cada átomo.
+    nbr_ptr : ndarray
+        array de N+1 elementos, los vecinos del átomo n son nbr_idx[nbr_ptr[n]:nbr_ptr[n+1]].
+    nbr_idx : ndarray
+        array con los vecinos de todos los átomos, concatenados en orden.
+    src : ndarray
+        array con el átomo de origen de cada par (átomo, vecino) de nbr_idx.
+    inv_deg : ndarray
+        array con el inverso del número de vecinos de cada átomo.
+    dr : ndarray
+        array con el vector entre cada par (átomo, vecino), orientado hacia y positivo.
+    dr_sign : ndarray
+        array con el signo (1 o -1) aplicado a cada par para orientar dr.
+    bond_class : ndarray
+        array con el índice de la dirección de enlace de cada par.
+    n_bond_classes : int
+        Número de direcciones de enlace distintas en la red.
+    perm : ndarray
+        array con el orden de Morton de los átomos, el átomo n del orden interno es el
+        átomo perm[n] de la red. Los métodos públicos reciben los espines en el orden
+        de la red y los reordenan internamente.
     """
 
     def __init__(self):
         self.len = 0
         self.vecinos = np.array([])
-        self.sublattice = []
+        self.sublattice = np.array([], dtype=np.int8)
         self.positions = []
 
+        # copia en float32 de la subred, para los productos con los espines
+        self._subf = np.array([], dtype=np.float32)
+
+        self.nbr_ptr = np.array([], dtype=np.int32)
+        self.nbr_idx = np.array([], dtype=np.int32)
+        self.src = np.array([], dtype=np.int32)
+        self.inv_deg = np.array([])
+
+        self.dr = np.empty((0, 3), dtype=np.float32)
+        self.dr_sign = np.array([], dtype=np.float32)
+        self.bond_class = np.array([], dtype=np.int32)
+        self.n_bond_classes = 0
+
+        self.perm = np.array([], dtype=np.intp)
+
+        # buffers reutilizados en cada evaluación de los criterios,
+        # se dimensionan en set_values
+        self._spins_src = np.empty((0, 3), dtype=np.float32)
+        self._spins_nbr = np.empty((0, 3), dtype=np.float32)
+        self._pair_dot = np.empty(0, dtype=np.float32)
+        self._m_per_atom = np.empty(0, dtype=np.float32)
+        self._abs_z = np.empty(0, dtype=np.float32)
+        self._spins_ordered = np.empty((0, 3), dtype=np.float32)
+
+        # pesos del promedio sobre vecinos cuando todos los átomos tienen
+        # la misma cantidad de vecinos, None en caso contrario
+        self._avg_weights = None
+
+        # cantidades de la configuración de espines en evaluación, se guardan en _bind
+        # al comenzar cada mapa de color y se liberan en _unbind al terminar
+        self._bound = None
+        self._sz = None
+        self._az = None
+        self._m = None
+        self._m_sub = None
+        self._m_values = None
+
 
     def set_values(self, n_atoms, vecinos, sublattice, positions):
         """
@@ -41,14 +251,225 @@ class Criteria:
             Lista de vecinos para cada átomo.
         sublattice : list
             Lista que indica la subred a la que pertenece cada átomo.
+            Se guarda como array de int8, junto con una copia en float32.
         positions : list
             Lista de posiciones de cada átomo.
+            Se guarda como array contiguo de float32.
+
+        Los átomos se reordenan según la curva de Morton de sus posiciones (ver perm),
+        de modo que los vecinos de cada átomo queden cerca en memoria.
         """
 
         self.len = n_atoms
+        positions = np.asarray(positions, dtype=np.float32)
+
+        # Renumeramos los átomos en orden de Morton, inverse lleva el índice
+        # original de un átomo a su índice en el nuevo orden
+        self.perm = _morton_order(positions)
+        inverse = np.empty_like(self.perm)
+        inverse[self.perm] = np.arange(n_atoms)
+
+        vecinos = [inverse[np.asarray(vecinos[n])] for n in self.perm]
+
         self.vecinos = vecinos
-        self.sublattice = sublattice
-        self.positions = positions
+        self.sublattice = np.ascontiguousarray(np.asarray(sublattice)[self.perm], dtype=np.int8)
+        self._subf = self.sublattice.astype(np.float32)
+        self.positions = np.ascontiguousarray(positions[self.perm])
+
+        # Guardamos los vecinos como una lista plana de pares (src, nbr_idx),
+        # de modo de evaluar todos los pares de vecinos de una vez
+        degrees = np.array([len(vecinos_n) for vecinos_n in vecinos])
+
+        self.nbr_ptr = np.concatenate([[0], np.cumsum(degrees)]).astype(np.int32)
+        self.nbr_idx = np.concatenate(vecinos).astype(np.int32)
+        self.src = np.repeat(np.arange(n_atoms, dtype=np.int32), degrees)
+        self.inv_deg = (1. / degrees).astype(np.float32)
+
+        # Las posiciones no cambian entre celdas del diagrama de fases, por lo que los
+        # vectores entre vecinos y su dirección de enlace se calculan una sola vez
+        dr = self.positions[self.src] - self.positions[self.nbr_idx]
+        flip = dr[:, 1] < 0.
+        dr[flip] *= -1.
+        self.dr = np.ascontiguousarray(dr)
+        self.dr_sign = np.where(flip, -1., 1.).astype(np.float32)
+
+        # Las direcciones de enlace se agrupan con una tolerancia de un cuarto de la
+        # distancia típica entre vecinos, de modo que pequeñas variaciones en las
+        # posiciones no separen una misma dirección en varias
+        bond_length = float(np.median(np.sqrt(np.einsum('ij,ij->i', self.dr, self.dr))))
+        self.bond_class, self.n_bond_classes = _cluster_vectors(self.dr, 0.25 * bond_length)
+
+        n_pairs = self.nbr_idx.size
+        self._spins_src = np.empty((n_pairs, 3), dtype=np.float32)
+        self._spins_nbr = np.empty((n_pairs, 3), dtype=np.float32)
+        self._pair_dot = np.empty(n_pairs, dtype=np.float32)
+        self._m_per_atom = np.empty(n_atoms, dtype=np.float32)
+        self._abs_z = np.empty(n_atoms, dtype=np.float32)
+        self._spins_ordered = np.empty((n_atoms, 3), dtype=np.float32)
+
+        # Si todos los átomos tienen la misma cantidad de vecinos, el promedio sobre
+        # vecinos es el producto de la matriz de N*k productos punto por un vector de pesos
+        if np.all(degrees == degrees[0]):
+            self._avg_weights = np.full(degrees[0], 1. / degrees[0], dtype=np.float32)
+        else:
+            self._avg_weights = None
+
+
+    def _reorder(self, spins):
+        """
+        Lleva los espines del orden de la red al orden de Morton usado internamente.
+        Los espines que ya están en el orden interno (el buffer de esta función o los
+        de _bind) se retornan tal cual.
+
+        Parámetros:
+        -----------
+        spins : ndarray
+            array de N*3 con los vectores de espines en el orden de la red.
+
+        Retorna:
+        --------
+        ndarray
+            array de N*3 con los espines en el orden interno.
+            El array se sobrescribe en la siguiente llamada.
+        """
+        if spins is self._bound or spins is self._spins_ordered:
+            return spins
+        return np.take(spins, self.perm, axis=0, out=self._spins_ordered)
+
+
+    def _gather_pairs(self, spins):
+        """
+        Copia los espines de cada par (átomo, vecino) en los buffers preasignados.
+
+        Parámetros:
+        -----------
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema.
+
+        Retorna:
+        --------
+        tuple
+            (ndarray, ndarray): espines del átomo de origen y del vecino de cada par.
+            Los arrays se sobrescriben en la siguiente llamada.
+        """
+        np.take(spins, self.src, axis=0, out=self._spins_src)
+        np.take(spins, self.nbr_idx, axis=0, out=self._spins_nbr)
+        return self._spins_src, self._spins_nbr
+
+
+    def _bind(self, spins):
+        """
+        Calcula una sola vez las cantidades de la configuración de espines que
+        comparten varios criterios, para que estos no vuelvan a recorrer los espines.
+
+        Parámetros:
+        -----------
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema.
+        """
+        self._bound = spins
+        self._sz = spins[:, 2]
+        self._az = np.abs(self._sz, out=self._abs_z)
+        self._m = spins.sum(axis=0)
+        self._m_sub = self._subf @ spins
+
+        # el promedio con los vecinos es más costoso, se calcula al pedirlo por primera vez
+        self._m_values = None
+
+
+    def _unbind(self):
+        """
+        Libera las cantidades guardadas por _bind, de modo de no retener los espines.
+        """
+        self._bound = None
+        self._sz = None
+        self._az = None
+        self._m = None
+        self._m_sub = None
+        self._m_values = None
+
+
+    def _get_sz(self, spins):
+        """
+        Retorna la componente Z de los espines, reutilizando la de _bind si corresponde.
+        """
+        return self._sz if spins is self._bound else spins[:, 2]
+
+
+    def _get_abs_sz(self, spins):
+        """
+        Retorna |sz| de los espines, reutilizando el de _bind si corresponde.
+        El array se sobrescribe en la siguiente llamada.
+        """
+        if spins is self._bound:
+            return self._az
+        return np.abs(spins[:, 2], out=self._abs_z)
+
+
+    def _get_magnetization(self, spins):
+        """
+        Retorna la magnetización total, reutilizando la de _bind si corresponde.
+        """
+        return self._m if spins is self._bound else spins.sum(axis=0)
+
+
+    def _get_staggered_magnetization(self, spins):
+        """
+        Retorna la magnetización alternada según la subred, reutilizando la de
+        _bind si corresponde.
+        """
+        return self._m_sub if spins is self._bound else self._subf @ spins
+
+
+    def _get_neighbor_dot(self, spins):
+        """
+        Retorna el promedio del producto punto con los vecinos de cada átomo,
+        calculándolo una sola vez mientras los espines estén en _bind.
+        """
+        if spins is not self._bound:
+            return self._neighbor_dot(spins)
+
+        if self._m_values is None:
+            self._m_values = self._neighbor_dot(spins)
+        return self._m_values
+
+
+    def get_neighbor_dot(self, spins):
+        """
+        Calcula, para cada átomo, el promedio del producto punto entre su espín
+        y el de sus vecinos.
+
+        Parámetros:
+        -----------
+        spins : ndarray
+            array de N*3 con los vectores de espines en el orden de la red.
+
+        Retorna:
+        --------
+        ndarray
+            array de N elementos con el valor promedio para cada átomo, en el orden de la red.
+        """
+        m_values = np.empty(self.len, dtype=np.float32)
+        m_values[self.perm] = self._neighbor_dot(self._reorder(spins))
+        return m_values
+
+
+    def _neighbor_dot(self, spins):
+        """
+        Calcula get_neighbor_dot con los espines en el orden interno.
+        El array retornado se sobrescribe en la siguiente llamada.
+        """
+        spins_src, spins_nbr = self._gather_pairs(spins)
+        np.einsum('ij,ij->i', spins_src, spins_nbr, out=self._pair_dot)
+
+        if self._avg_weights is not None:
+            np.matmul(self._pair_dot.reshape(self.len, -1), self._avg_weights,
+                      out=self._m_per_atom)
+        else:
+            np.add.reduceat(self._pair_dot, self.nbr_ptr[:-1], out=self._m_per_atom)
+            self._m_per_atom *= self.inv_deg
+
+        return self._m_per_atom
 
 
     def is_ferro_z_aligned(self, spins):
@@ -57,16 +478,17 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
         bool
             True si el sistema está alineado ferromagnéticamente en Z, False en caso contrario.
         """
-        mag_z = np.sum([spins[n][2] for n in range(self.len)])
-        value = np.abs(mag_z) / self.len
+        spins = self._reorder(spins)
+
+        value = abs(float(self._get_magnetization(spins)[2])) / self.len
         return value > 0.99
 
 
@@ -76,16 +498,17 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
         bool
             True si el sistema está alineado antiferromagnéticamente en Z, False en caso contrario.
         """
-        mag_z = np.sum([spins[n][2] * self.sublattice[n] for n in range(self.len)])
-        value = np.abs(mag_z) / self.len
+        spins = self._reorder(spins)
+
+        value = abs(float(self._get_staggered_magnetization(spins)[2])) / self.len
         return value > 0.99
 
 
@@ -95,8 +518,8 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
@@ -104,11 +527,13 @@ class Criteria:
             True si el sistema está alineado ferromagnéticamente en el plano XY,
             False en caso contrario.
         """
+        spins = self._reorder(spins)
+
+        # magnetización total del sistema
+        mag_vec = self._get_magnetization(spins)
 
-        mag_x = np.sum([spins[n][0] for n in range(self.len)])
-        mag_y = np.sum([spins[n][1] for n in range(self.len)])
-        mag_z = np.abs(np.sum([spins[n][2] for n in range(self.len)])) / self.len
-        mag = np.sqrt(mag_x**2 + mag_y**2 + mag_z**2) / self.len
+        mag_z = abs(float(mag_vec[2])) / self.len
+        mag = float(np.sqrt(mag_vec.dot(mag_vec))) / self.len
 
         return mag_z < 0.1 and mag > 0.9
 
@@ -119,8 +544,8 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
@@ -128,12 +553,15 @@ class Criteria:
             True si el sistema está alineado antiferromagnéticamente en el plano XY,
             False en caso contrario.
         """
-        mag_x = np.sum([spins[n][0] * self.sublattice[n] for n in range(self.len)])
-        mag_y = np.sum([spins[n][1] * self.sublattice[n] for n in range(self.len)])
-        mag_z = np.sum([spins[n][2] * self.sublattice[n] for n in range(self.len)]) / self.len
-        mag = np.sqrt(mag_x**2 + mag_y**2 + mag_z**2) / self.len
+        spins = self._reorder(spins)
 
-        return np.abs(mag_z) < 0.1 and mag > 0.9
+        # magnetización alternada (staggered) del sistema
+        mag_vec = self._get_staggered_magnetization(spins)
+
+        mag_z = abs(float(mag_vec[2])) / self.len
+        mag = float(np.sqrt(mag_vec.dot(mag_vec))) / self.len
+
+        return mag_z < 0.1 and mag > 0.9
 
 
     def is_xyz_aligned(self, spins):
@@ -142,8 +570,8 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
@@ -151,9 +579,12 @@ class Criteria:
             (bool, bool): Dos booleanos indicando si los espines están 
             alineados en Z o en XY respectivamente.
         """
+        spins = self._reorder(spins)
 
-        counter_z = np.sum([1 for n in range(self.len) if np.abs(spins[n][2]) > 0.95]) / self.len
-        counter_xy = np.sum([1 for n in range(self.len) if np.abs(spins[n][2]) < 0.05]) / self.len
+        abs_z = self._get_abs_sz(spins)
+
+        counter_z = np.count_nonzero(abs_z > 0.95) / self.len
+        counter_xy = np.count_nonzero(abs_z < 0.05) / self.len
 
         is_z_aligned = counter_z > 0.7
         is_xy_aligned = counter_xy > 0.8
@@ -167,8 +598,8 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
@@ -176,17 +607,12 @@ class Criteria:
             (bool, bool): Dos booleanos indicando si el sistema es ferromagnético 
             localmente o antiferromagnético localmente.
         """
-        counter_ferro = 0
-        counter_antiferro = 0
+        spins = self._reorder(spins)
 
-        for n in range(self.len):
-            spin_n = spins[n]
-            m_value = np.sum([spin_n.dot(spins[m]) for m in self.vecinos[n]]) / len(self.vecinos[n])
+        m_values = self._get_neighbor_dot(spins)
 
-            if m_value > 0.99:
-                counter_ferro += 1
-            elif m_value < -0.99:
-                counter_antiferro += 1
+        counter_ferro = np.count_nonzero(m_values > 0.99)
+        counter_antiferro = np.count_nonzero(m_values < -0.99)
 
         is_ferro = counter_ferro / self.len > 0.65
         is_antiferro = counter_antiferro / self.len > 0.65
@@ -200,29 +626,23 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
         bool
             True si se detecta una inversión de espines en Z en la subred, False en caso contrario.
         """
+        spins = self._reorder(spins)
 
-        spin_up = np.array([0., 0., 1.])
-        spin_down = np.array([0., 0., -1.])
-        min_up = 1
-        min_down = 1
-
-        for i in range(self.len):
-            if self.sublattice[i] == 1:
-                spin_i = spins[i]
-                min_up = min(min_up, spin_up.dot(spin_i))
-                min_down = min(min_down, spin_down.dot(spin_i))
-                if (min_up < -0.9 and min_down < -0.9):
-                    return True
+        # Hay una inversión si en la subred hay spines apuntando hacia arriba (sz > 0.9)
+        # y hacia abajo (sz < -0.9). Notar que spin_up.dot(spin) = sz y spin_down.dot(spin) = -sz
+        spins_z = self._get_sz(spins)[self.sublattice == 1]
+        if spins_z.size == 0:
+            return False
 
-        return False
+        return bool(spins_z.min() < -0.9 and spins_z.max() > 0.9)
 
     # spines localmente aleatorios
     def is_random(self, spins):
@@ -231,19 +651,17 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
         bool
             True si los espines están distribuidos aleatoriamente, False en caso contrario.
         """
+        spins = self._reorder(spins)
 
-        dot_value = np.sum([
-            np.sum([spins[n].dot(spins[m]) for m in self.vecinos[n]]) / len(self.vecinos[n])
-            for n in range(self.len)
-        ])
+        dot_value = self._get_neighbor_dot(spins).sum()
 
         return np.abs(dot_value) < 0.01
 
@@ -254,8 +672,8 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
@@ -263,46 +681,43 @@ class Criteria:
             (bool, bool): Dos booleanos indicando si el sistema tiene
             una estructura cónica o helicoidal.
         """
+        spins = self._reorder(spins)
 
-        rotation_vec = np.zeros(3)
-        traslation_vec = np.zeros(3)
 
-        count = 0
+        # Producto cruz entre los espines de cada par de vecinos
+        cross_vecs = np.cross(*self._gather_pairs(spins))
+        mag2_cross = np.einsum('ij,ij->i', cross_vecs, cross_vecs)
 
-        for i, (spin_i, position_i) in enumerate(zip(spins, self.positions)):
-            for j in self.vecinos[i]:
-                cross_vec = np.cross(spin_i, spins[j])
-                mag_cross = np.linalg.norm(cross_vec)
-                # el caso (i x j) y el caso (j x i) dan signos opuestos.
-                # Invertiremos el que vaya en direccion opuesta al eje de rotacion
-                if cross_vec.dot(rotation_vec) < 0:
-                    cross_vec = -1.*cross_vec
+        # si mag_cross es no nulo, estamos considerando spines que rotan.
+        # Se compara su cuadrado con 0.01**2 para no calcular la raíz
+        rotating = mag2_cross > 1e-4
+        count = np.count_nonzero(rotating)
 
-                # si mag_cross es no nulo, estamos considerando spines que rotan.
-                # Actualizamos rotation_vec
-                if mag_cross > 0.01:
-                    rotation_vec += cross_vec
-                    count += 1
+        if count:
+            # el caso (i x j) y el caso (j x i) dan signos opuestos.
+            # Orientamos cada producto cruz según el vector entre vecinos, de modo que
+            # ambos casos coincidan, y sumamos los de cada dirección de enlace
+            oriented = cross_vecs[rotating] * self.dr_sign[rotating, None]
 
-                # si mag_cross es nulo, los spines son paralelos, actualiamos traslation_vec
-                else:
-                    r_vec = position_i - self.positions[j]
-                    if r_vec[1] < 0.:
-                        r_vec = -1.*r_vec
-                    traslation_vec += r_vec
+            class_sums = np.zeros((self.n_bond_classes, 3))
+            np.add.at(class_sums, self.bond_class[rotating], oriented)
+
+            # Invertiremos las direcciones de enlace que vayan en dirección opuesta al eje
+            # de rotación, buscando la combinación de signos que da el mayor eje
+            rotation_vec = _orient_and_sum(class_sums)
 
-        if count:
             rotation_mag = np.sqrt(rotation_vec.dot(rotation_vec))
             rotation_vec /= rotation_mag
-            mean_dot_value = np.sum([np.abs(spin_i.dot(rotation_vec)) for spin_i in spins]) / count
-            max_dot_value = np.amax([np.abs(spin_i.dot(rotation_vec)) for spin_i in spins])
+
+            # Proyección de cada espín sobre el eje de rotación, promediada sobre los átomos
+            projection = np.abs(spins @ rotation_vec)
+            mean_dot_value = projection.sum() / self.len
+            max_dot_value = projection.max()
 
         else:
             mean_dot_value = float("inf")
             max_dot_value = float("inf")
 
-        print("mean dot value:", mean_dot_value)
-
         is_locally_conical = mean_dot_value < 0.1
         is_globally_conical = max_dot_value < 0.1
 
@@ -321,75 +736,75 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
         numpy.array
             Un array RGB representando el color asociado a la fase detectada.
+            Es una vista de solo lectura de la tabla de colores de las fases.
         """
-        is_ferro_local, is_antiferro_local = self.is_local_ferro_antiferro(spins)
-        is_z_aligned, is_xy_aligned = self.is_xyz_aligned(spins)
-        domain_wall = self.domain_wall_ferro_z_align(spins)
-
-        is_ferro_in_z = self.is_ferro_z_aligned(spins)
-        is_ferro_in_xy = self.is_ferro_xy_aligned(spins)
-        is_antiferro_in_z = self.is_antiferro_z_aligned(spins)
-        is_antiferro_in_xy = self.is_antiferro_xy_aligned(spins)
-
-        is_random = self.is_random(spins)
-
-        color = np.array([0., 0., 0.])
-
-        #  ==================Regiones intermedias =======================
-        if is_antiferro_local and not is_z_aligned and not is_xy_aligned:
-            # color cian
-            color = np.array([113,255,240])/255
-
-        elif is_z_aligned and not is_ferro_local and not is_antiferro_local:
-            # color verde claro
-            color = np.array([194,255,113])/255
-
-        elif is_xy_aligned and not is_ferro_local and not is_antiferro_local:
-            # color lavanda
-            color = np.array([177,113,255])/255
-
-        elif is_ferro_local and not is_z_aligned and not is_xy_aligned:
-            # color rojo claro
-            color = np.array([255,113,113])/255
-
-        #  ================= 4 fases principales =========================
-        elif is_ferro_in_z:
-            # color amarillo
-            color = np.array([255,231,113])/255
-
-        elif is_antiferro_in_z:
-            # color verde
-            color = np.array([113,255,133])/255
-
-        elif is_ferro_in_xy:
-            # color rosa
-            color = np.array([255,113,180])/255
-
-        elif is_antiferro_in_xy:
-            # color celeste oscuro
-            color = np.array([113,193,255])/255
-
-        # paredes de dominio
-        elif is_ferro_local and is_z_aligned and domain_wall:
-            color = np.array([255,150,113])/255
-        elif is_antiferro_local and is_z_aligned and domain_wall:
-            color = np.array([50,194,78])/255
-
-        # paramagnetismo
-        elif is_random:
-            color = np.array([0.,0.,0.])
-        # without criteria
-        else:
-            color = np.array([255,255,255])/255
-
-        return color
+        spins = self._reorder(spins)
+
+        # Las cantidades comunes a varios criterios se calculan una sola vez. Los
+        # criterios globales, las paredes de dominio y el caso aleatorio solo se
+        # evalúan al llegar a su caso
+        self._bind(spins)
+        try:
+            is_ferro_local, is_antiferro_local = self.is_local_ferro_antiferro(spins)
+            is_z_aligned, is_xy_aligned = self.is_xyz_aligned(spins)
+
+            #  ==================Regiones intermedias =======================
+            if is_antiferro_local and not is_z_aligned and not is_xy_aligned:
+                # color cian
+                phase_id = _PHASE_ANTIFERRO_LOCAL
+
+            elif is_z_aligned and not is_ferro_local and not is_antiferro_local:
+                # color verde claro
+                phase_id = _PHASE_Z_ALIGNED
+
+            elif is_xy_aligned and not is_ferro_local and not is_antiferro_local:
+                # color lavanda
+                phase_id = _PHASE_XY_ALIGNED
+
+            elif is_ferro_local and not is_z_aligned and not is_xy_aligned:
+                # color rojo claro
+                phase_id = _PHASE_FERRO_LOCAL
+
+            #  ================= 4 fases principales =========================
+            elif self.is_ferro_z_aligned(spins):
+                # color amarillo
+                phase_id = _PHASE_FERRO_Z
+
+            elif self.is_antiferro_z_aligned(spins):
+                # color verde
+                phase_id = _PHASE_ANTIFERRO_Z
+
+            elif self.is_ferro_xy_aligned(spins):
+                # color rosa
+                phase_id = _PHASE_FERRO_XY
+
+            elif self.is_antiferro_xy_aligned(spins):
+                # color celeste oscuro
+                phase_id = _PHASE_ANTIFERRO_XY
+
+            # paredes de dominio
+            elif is_ferro_local and is_z_aligned and self.domain_wall_ferro_z_align(spins):
+                phase_id = _PHASE_FERRO_DOMAIN_WALL
+            elif is_antiferro_local and is_z_aligned and self.domain_wall_ferro_z_align(spins):
+                phase_id = _PHASE_ANTIFERRO_DOMAIN_WALL
+
+            # paramagnetismo
+            elif self.is_random(spins):
+                phase_id = _PHASE_RANDOM
+            # without criteria
+            else:
+                phase_id = _PHASE_NO_CRITERIA
+        finally:
+            self._unbind()
+
+        return _PHASE_COLORS[phase_id]
 
 
     def data_ferro_spiral_skyrmions(self, spins):
@@ -399,51 +814,59 @@ class Criteria:
 
         Parámetros:
         -----------
-        spins : list
-            Lista de vectores de espines en el sistema.
+        spins : ndarray
+            array de N*3 con los vectores de espines en el sistema, en el orden de la red.
 
         Retorna:
         --------
         numpy.array
             Un array RGB representando el color asociado a la fase detectada.
+            Es una vista de solo lectura de la tabla de colores de las fases.
         """
-        is_ferro_in_z = self.is_ferro_z_aligned(spins)
-        is_ferro_in_xy = self.is_ferro_xy_aligned(spins)
-        is_antiferro_in_z = self.is_antiferro_z_aligned(spins)
-        is_antiferro_in_xy = self.is_antiferro_xy_aligned(spins)
-
-        is_locally_conical, is_globally_conical = self.is_conical(spins)
-
-        color = np.array([0., 0., 0.])
+        spins = self._reorder(spins)
+
+        # Las magnetizaciones se calculan una sola vez para los 4 criterios globales
+        self._bind(spins)
+        try:
+            is_ferro_in_z = self.is_ferro_z_aligned(spins)
+            is_ferro_in_xy = self.is_ferro_xy_aligned(spins)
+            is_antiferro_in_z = self.is_antiferro_z_aligned(spins)
+            is_antiferro_in_xy = self.is_antiferro_xy_aligned(spins)
+        finally:
+            self._unbind()
 
         # ================= casos ferro/antiferro en XY/Z ===============
         if is_ferro_in_z:
             # color amarillo
-            color = np.array([255,231,113])/255
+            return _PHASE_COLORS[_PHASE_FERRO_Z]
 
-        elif is_antiferro_in_z:
+        if is_antiferro_in_z:
             # color verde
-            color = np.array([113,255,133])/255
+            return _PHASE_COLORS[_PHASE_ANTIFERRO_Z]
 
-        elif is_ferro_in_xy:
+        if is_ferro_in_xy:
             # color rosa
-            color = np.array([255,113,180])/255
+            return _PHASE_COLORS[_PHASE_FERRO_XY]
 
-        elif is_antiferro_in_xy:
+        if is_antiferro_in_xy:
             # color celeste oscuro
-            color = np.array([113,193,255])/255
+            return _PHASE_COLORS[_PHASE_ANTIFERRO_XY]
 
         # ================== casos espirales =======================
-        elif is_globally_conical:
+        # is_conical es el criterio más costoso, solo se evalúa si ninguna
+        # de las fases globales se cumple
+        is_locally_conical, is_globally_conical = self.is_conical(spins)
+
+        if is_globally_conical:
             # color lavanda
-            color = np.array([177,113,255])/255
+            phase_id = _PHASE_GLOBALLY_CONICAL
 
         elif is_locally_conical:
             # color rojo claro
-            color = np.array([255,113,113])/255
+            phase_id = _PHASE_LOCALLY_CONICAL
 
         # without criteria
         else:
-            color = np.array([255,255,255])/255
+            phase_id = _PHASE_NO_CRITERIA
 
-        return color
+        return _PHASE_COLORS[phase_id]
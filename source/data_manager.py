@@ -4,6 +4,9 @@ Contiene la clase DataManager
 utilizado para realizar diagramas de fases
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
 from tqdm import tqdm
@@ -12,6 +15,39 @@ from path_manager import PathManager
 from lattice import Lattice
 from criteria import Criteria
 
+# Estado de cada proceso que evalúa celdas del diagrama de fases,
+# se define una sola vez por proceso en _init_worker
+_WORKER = {}
+
+
+def _init_worker(path_manager : PathManager, function : callable) -> None:
+    """
+    Guarda en el proceso el PathManager, el criterio a evaluar y una red con la
+    estructura ya cargada. El criterio ya viene inicializado con la red, por lo
+    que Criteria.set_values no se repite.
+    """
+    lattice = Lattice()
+    lattice.load_topology(path_manager.structure)
+
+    _WORKER["path_manager"] = path_manager
+    _WORKER["function"] = function
+    _WORKER["lattice"] = lattice
+
+
+def _eval_cell(cell : tuple) -> tuple:
+    """
+    Carga la configuración de spins de la celda (j, k, var1, var2) y evalúa el criterio,
+    retornando (j, k, color)
+    """
+    j, k, var1, var2 = cell
+
+    # Solo se leen los spins, la estructura de la red es la misma en todas las celdas
+    file = _WORKER["path_manager"].get_file_path("", var1, var2) + "_spin"
+    spins = _WORKER["lattice"].load_spins(file)
+
+    return j, k, _WORKER["function"](spins)
+
+
 class DataManager:
     """
     a
@@ -19,38 +55,69 @@ class DataManager:
     def __init__(self,
                  path_manager : PathManager,
                  variables : dict,
+                 verbose : bool = False
                  ):
         # Nombres de archivos y variables
         self.path_manager = path_manager
 
-        # Data para el diagrama de fases en RGB
         self.var1_list = variables["first"]
         self.var2_list = variables["second"]
 
-        self.data = np.zeros((len(self.var1_list), len(self.var2_list), 3))
+        # Si es True, se informa cada celda evaluada del diagrama de fases
+        self.verbose = verbose
+
+        # Data para el diagrama de fases, cada pixel contiene el índice de su color
+        # en la paleta RGB
+        self.palette = []
+        self.palette_indices = {}
+        self.data = np.zeros((len(self.var1_list), len(self.var2_list)), dtype=np.int8)
 
         self.criteria = Criteria()
 
 
+    def get_palette_index(self, color : np.array) -> int:
+        """
+        Retorna el índice del color en la paleta, añadiéndolo si aún no está en ella
+        """
+        key = tuple(color)
+        if key not in self.palette_indices:
+            self.palette_indices[key] = len(self.palette)
+            self.palette.append(np.asarray(color))
+
+        return self.palette_indices[key]
+
+
     def set_data(self, function : callable) -> None:
         """
         a
         """
-        for j, var1 in tqdm(enumerate(self.var1_list)):
-            for k, var2 in enumerate(self.var2_list):
-                print("var1:", var1, "var2:", var2)
-                lattice = Lattice()
-
-                structure = self.path_manager.structure
-                file = self.path_manager.get_file_path("", var1, var2) + "_spin"
-                lattice.load_files(structure, file)
-
-                if self.criteria.len == 0:
-                    lattice.set_sublattice()
-                    self.criteria.set_values(lattice.n_atoms,
-                                             lattice.vecinos,
-                                             lattice.sublattice,
-                                             lattice.position
-                                             )
-
-                self.data[j][k] = function(lattice.spins)
+        # Inicializamos los criterios con la estructura de la red, antes de
+        # repartir el criterio entre los procesos
+        if self.criteria.len == 0:
+            lattice = Lattice()
+            lattice.load_topology(self.path_manager.structure)
+            lattice.set_sublattice()
+            self.criteria.set_values(lattice.n_atoms,
+                                     lattice.vecinos,
+                                     lattice.sublattice,
+                                     lattice.position
+                                     )
+
+        cells = [(j, k, var1, var2)
+                 for j, var1 in enumerate(self.var1_list)
+                 for k, var2 in enumerate(self.var2_list)]
+
+        # Cada celda es independiente, por lo que se reparten entre varios procesos
+        n_workers = os.cpu_count()
+        chunksize = max(1, len(cells) // (4 * n_workers))
+
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.path_manager, function)
+                                 ) as executor:
+            results = executor.map(_eval_cell, cells, chunksize=chunksize)
+
+            for (j, k, color), (_, _, var1, var2) in tqdm(zip(results, cells), total=len(cells)):
+                if self.verbose:
+                    tqdm.write(f"var1: {var1} var2: {var2}")
+                self.data[j][k] = self.get_palette_index(color)
@@ -21,6 +21,12 @@ class GraphMaker:
         Objeto canvas de vpython donde se renderizará la visualización.
     colors : dict
         Diccionario que mapea las direcciones de los spins (up, down, mid) a colores específicos.
+    palette : list
+        Lista con los colores del gradiente precalculados para 256 valores de la componente z
+        del spin, equiespaciados entre -1 y 1.
+    balls, arrows : dict
+        Diccionarios con las esferas y flechas ya creadas en el canvas, indexadas por átomo.
+        Se reutilizan al volver a graficar los spins y se vacían al crear un nuevo canvas.
     
     MÉTODOS:
     --------
@@ -28,11 +34,16 @@ class GraphMaker:
         Inicializa el objeto GraphMaker cargando la red de spins desde los archivos proporcionados.
     get_vpython_vector(array):
         Convierte un array numpy en un vector de vpython.
+    gradient_color(spin_z):
+        Calcula el color del gradiente asociado a la componente z de un spin.
+    get_spin_color(spin):
+        Obtiene el color de un spin a partir de la paleta precalculada.
     make_canvas(rotate):
         Crea el canvas de vpython donde se visualizará la red de spins,
         con la opción de rotar la vista.
     plot_spins(sublattice):
         Visualiza los spins en el canvas, con la opción de de mostrar una subred específica.
+        Si los spins ya fueron graficados, actualiza las flechas existentes.
     """
 
     def __init__(self, structure_file : str, spin_file : str):
@@ -51,6 +62,7 @@ class GraphMaker:
         1. Inicializa la red de spins a partir de los archivos proporcionados.
         2. Define un canvas de vpython para la visualización.
         3. Asigna un conjunto de colores para representar diferentes orientaciones de spins.
+        4. Precalcula la paleta de colores del gradiente.
         """
         self.lattice = Lattice()
         self.scene = vp.canvas()
@@ -61,6 +73,13 @@ class GraphMaker:
             "mid" : vp.vector(0.9,0.9,0.1),
         }
 
+        # Paleta del gradiente, el índice i corresponde a sz = i/127.5 - 1
+        self.palette = [self.gradient_color(i/127.5 - 1.) for i in range(256)]
+
+        # objetos del canvas, se crean al graficar los spins por primera vez
+        self.balls = {}
+        self.arrows = {}
+
         self.lattice.load_files(structure_file, spin_file)
 
 
@@ -82,14 +101,14 @@ class GraphMaker:
         return vp.vector(array[0], array[1], array[2])
 
 
-    def get_spin_color(self, spin : np.array) -> vp.vector:
+    def gradient_color(self, spin_z : float) -> vp.vector:
         """
-        Determina el color de un spin basado en su componente z utilizando un gradiente de colores.
+        Calcula el color asociado a la componente z de un spin utilizando un gradiente de colores.
 
         PARAMETROS:
         -----------
-        spin : np.array
-            Array de 3 elementos que representa el vector de spin en el espacio.
+        spin_z : float
+            Componente z del vector de spin.
 
         RETORNO:
         --------
@@ -98,16 +117,41 @@ class GraphMaker:
         """
         # Definimos el color del spin mediante un gradiente de color: A*r + B(1-r).
         # Se tomará como parámetro la componente z del spin.
-        r = np.abs(spin[2])
+        spin_z = float(spin_z)
+        r = abs(spin_z)
 
         # Hay un gradiente de color desde sz=1 a sz=0 y otro de sz=0 a sz=-1
-        if spin[2] < 0:
+        if spin_z < 0:
             color = self.colors["down"]*r + self.colors["mid"]*(1-r)
         else:
             color = self.colors["up"]*r + self.colors["mid"]*(1-r)
         return color
 
 
+    def get_spin_color(self, spin : np.array) -> vp.vector:
+        """
+        Determina el color de un spin basado en su componente z, utilizando la paleta
+        precalculada del gradiente de colores.
+
+        PARAMETROS:
+        -----------
+        spin : np.array
+            Array de 3 elementos que representa el vector de spin en el espacio.
+
+        RETORNO:
+        --------
+        vp.vector
+            Vector de vpython que representa el color del spin.
+        """
+        spin_z = spin[2]
+
+        # Si la componente z está fuera de [-1, 1] (o es NaN) se calcula el color exacto
+        if not -1. <= spin_z <= 1.:
+            return self.gradient_color(spin_z)
+
+        return self.palette[int((spin_z + 1.)*127.5 + 0.5)]
+
+
     def make_canvas(self, rotate : bool) -> None:
         """
         Crea y configura un canvas de vpython donde se visualizará la red de spins.
@@ -125,6 +169,11 @@ class GraphMaker:
                              background = vp.vector(1.0,1.0,0.97)
                             )
 
+        # Los objetos ya creados pertenecen al canvas anterior, en el nuevo canvas
+        # se vuelven a crear al graficar los spins
+        self.balls = {}
+        self.arrows = {}
+
         # Ajustamos la amplitud de la camara
         self.scene.autoscale = False
         self.scene.range = np.max(self.lattice.size)*0.38
@@ -151,31 +200,51 @@ class GraphMaker:
         if sublattice != 0:
             self.lattice.set_sublattice()
 
-        # arrays que contendrán los objetos del canvas
-        balls=[]
-        arrows=[]
+        # Definimos la dirección de cada spin mediante vectores de vpython,
+        # convirtiendo los arrays a listas de python una sola vez
+        spins = self.lattice.spins.tolist()
+        directions = [vp.vector(*row) for row in spins]
+        positions = None
+
+        # Índices de los átomos a graficar
+        if sublattice == 0:
+            selected = range(self.lattice.n_atoms)
+        else:
+            selected = np.flatnonzero(self.lattice.sublattice == sublattice).tolist()
 
         # Graficamos cada uno de los spines
-        for i in range(self.lattice.n_atoms):
-            if sublattice not in (0, self.lattice.sublattice[i]):
+        arrow_size = 7.
+        for i in selected:
+            direction = directions[i]
+            color_arrow = self.get_spin_color(spins[i])
+
+            # Si el átomo ya fue graficado, solo actualizamos su flecha
+            if i in self.arrows:
+                arrow = self.arrows[i]
+                arrow.axis = arrow_size*vp.vector(direction)
+                arrow.color = color_arrow
+                arrow.visible = True
+                self.balls[i].visible = True
                 continue
 
-            # Definimos la posición y dirección del spin mediante
-            # vectores de vpython
-            position = self.get_vpython_vector(self.lattice.position[i])
-            direction = self.get_vpython_vector(self.lattice.spins[i])
+            if positions is None:
+                positions = [vp.vector(*row) for row in self.lattice.position.tolist()]
+            position = positions[i]
 
             # Creamos una esfera en el origen del spin
-            ball = vp.sphere(color=vp.vector(0.4,0.2,0.9), radius=0.4)
+            ball = vp.sphere(canvas=self.scene, color=vp.vector(0.4,0.2,0.9), radius=0.4)
             ball.pos = position
 
-            balls.append(ball)
+            self.balls[i] = ball
 
             # Creamos una flecha en la dirección del spin con el gradiente de color
-            arrow_size = 7.
-            color_arrow = self.get_spin_color(self.lattice.spins[i])
-
-            arrow = vp.arrow(shaftwidth=arrow_size/10, color=color_arrow, round=True)
+            arrow = vp.arrow(canvas=self.scene, shaftwidth=arrow_size/10, color=color_arrow,
+                             round=True)
             arrow.pos = position
             arrow.axis = arrow_size*vp.vector(direction)
-            arrows.append(arrow)
+            self.arrows[i] = arrow
+
+        # Ocultamos los átomos graficados anteriormente que no pertenecen a la subred
+        for i in self.arrows.keys() - set(selected):
+            self.balls[i].visible = False
+            self.arrows[i].visible = False
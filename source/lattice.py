@@ -4,8 +4,6 @@ Contiene la clase Lattice
 utilizado para plotear spins y para realizar diagramas de fases
 """
 
-from queue import Queue
-
 import numpy as np
 
 class Lattice:
@@ -16,9 +14,9 @@ class Lattice:
     ATRIBUTOS:
     ----------
     spins : ndarray
-        array 2D conteniendo las componentes de spin para cada átomo.
+        array 2D (float32) conteniendo las componentes de spin para cada átomo.
     position : ndarray
-        array conteniendo las posiciones espaciales para cada átomo.
+        array 2D (float32) conteniendo las posiciones espaciales para cada átomo.
     vecinos : ndarray
         array conteniendo los vecinos más cercanos para cada átomo.
     n_atoms : int
@@ -37,6 +35,10 @@ class Lattice:
     load_files(structure_file, spin_file):
         Carga la configuración de la red y de los spins a partir de los archivos 
         de entrada especificados.
+    load_topology(structure_file):
+        Carga solo la estructura de la red.
+    load_spins(spin_file):
+        Carga solo la configuración de spins, reutilizando el array de spins.
     make_sublattice():
         Método reservado para futuras implementaciones que generarán una subred 
         a partir de la red principal.
@@ -80,73 +82,90 @@ class Lattice:
         """
 
         try:
-            # Leer archivo de estructura espacial
-            with open(structure_file, 'r', encoding="utf-8") as file:
-                lines = file.readlines()
-
-            # Leer archivo de configuración de spins
-            with open(spin_file, 'r', encoding="utf-8") as file:
-                spin_lines = file.readlines()
+            self.load_topology(structure_file)
+            self.load_spins(spin_file)
 
         except FileNotFoundError as e:
             print(f"Error: {e}")
-            return
 
-        # definimos el numero de atomos en la estructura
-        header_data = lines[0].split()
-        self.n_atoms = int(header_data[1])
 
-        # Realocamos los np.array
-        self.position = np.zeros((self.n_atoms, 3))
-        self.sublattice = np.zeros((self.n_atoms,), dtype=int)
-        self.spins = np.zeros((self.n_atoms, 3))
-        self.vecinos = np.zeros((self.n_atoms, 3), dtype=int)
-
-        # Guardamos la posición de cada átomo, la indexación debe corregirse
-        # ya que originalmente estaba para Fortran
-        for i, line in enumerate(lines[1:self.n_atoms + 1]):
-            atom_data = line.split()
-            self.position[i] = [float(atom_data[1]), float(atom_data[2]), float(atom_data[3])]
-            self.vecinos[i] = [int(atom_data[4]) - 1, int(atom_data[5]) - 1, int(atom_data[6]) - 1]
+    def load_topology(self, structure_file):
+        """
+        Carga la estructura espacial de la red (posiciones y vecinos) y reserva
+        el array que contendrá los spins.
 
+        Parámetros:
+        -----------
+        structure_file : str
+            Ruta del archivo que contiene la estructura espacial de la red.
+        """
+        # Leer archivo de estructura espacial, la primera línea contiene
+        # el numero de atomos en la estructura
+        with open(structure_file, 'r', encoding="utf-8") as file:
+            header_data = file.readline().split()
+            self.n_atoms = int(header_data[1])
+            structure_data = np.loadtxt(file, dtype=np.float32,
+                                        max_rows=self.n_atoms, ndmin=2)
 
-        # Guardamos la información de los spins
-        for i, line in enumerate(spin_lines[0:self.n_atoms]):
-            # obtenemos las componentes del spin del atomo i-esimo
-            spin_data = line.split()
-            self.spins[i] = [float(spin_data[1]), float(spin_data[2]), float(spin_data[3])]
+        # Guardamos la posición de cada átomo, la indexación debe corregirse
+        # ya que originalmente estaba para Fortran.
+        # Posiciones y spins se guardan en precisión simple, suficiente para los
+        # criterios y la visualización
+        self.position = structure_data[:, 1:4].copy()
+        self.vecinos = structure_data[:, 4:7].astype(np.int32) - 1
+        self.sublattice = np.zeros((self.n_atoms,), dtype=np.int8)
+        self.spins = np.zeros((self.n_atoms, 3), dtype=np.float32)
 
         # Definir el tamaño de la red
-        self.dimensions = np.amax(self.position, axis=0) - np.amin(self.position, axis=0)
+        self.dimensions = np.ptp(self.position, axis=0)
         self.size = np.max(self.dimensions)
 
 
+    def load_spins(self, spin_file):
+        """
+        Carga la configuración de los spins sobre el array ya reservado por
+        load_topology, sin volver a leer la estructura de la red.
+
+        Parámetros:
+        -----------
+        spin_file : str
+            Ruta del archivo que contiene la configuración de los spins.
+
+        Retorna:
+        --------
+        ndarray
+            array de N*3 con los spins, se sobrescribe en la siguiente llamada.
+        """
+        # Cada línea contiene el índice del átomo y las 3 componentes de su spin
+        spin_data = np.fromfile(spin_file, dtype=np.float32, count=4*self.n_atoms, sep=" ")
+        self.spins[:] = spin_data.reshape(self.n_atoms, 4)[:, 1:4]
+
+        return self.spins
+
+
     def set_sublattice(self):
         """
         Genera una subred a partir de la red principal utilizando un algoritmo de
-        búsqueda por anchura (BFS).
+        búsqueda por anchura (BFS), procesando cada nivel de la búsqueda de una vez.
 
         La sublattice se construye asignando valores alternantes (+1 o -1) a los átomos 
         vecinos en la red, partiendo del primer átomo, al que se le asigna un valor de +1.
-    """
-        # Creamos una cola que contendrá los nodos a iterar,
-        # junto con una lista para comprobar los nodos ya visitados
-        queue_nodes =  Queue()
-        checked = np.zeros(self.n_atoms, dtype=bool)
+        """
+        sublattice = np.zeros(self.n_atoms, dtype=np.int8)
 
         # Definimos el primer atomo de alguna sublattice
-        self.sublattice[0] = 1
-        queue_nodes.put(0)
-        checked[0] = True
-
-        # Llenamos las sublattice de forma recursiva.
-        # Si el vecino está definido, entonces el átomo toma el valor opuesto,
-        # si no está definido y no está en la cola, el vecino se añade a la cola.
-        while not queue_nodes.empty():
-            node = queue_nodes.get()
-            for vecino in self.vecinos[node]:
-                if self.sublattice[vecino] != 0:
-                    self.sublattice[node] = -self.sublattice[vecino]
-                elif not checked[vecino]:
-                    queue_nodes.put(vecino)
-                    checked[vecino] = True
+        sublattice[0] = 1
+        frontier = np.array([0])
+
+        # En cada nivel, los vecinos aún no definidos de la frontera toman el valor
+        # opuesto al del átomo desde el que se alcanzan, y pasan a ser la nueva frontera
+        while frontier.size:
+            neighbors = self.vecinos[frontier]
+            signs = np.broadcast_to(-sublattice[frontier, None], neighbors.shape)
+
+            new = sublattice[neighbors] == 0
+            sublattice[neighbors[new]] = signs[new]
+
+            frontier = np.unique(neighbors[new])
+
+        self.sublattice = sublattice
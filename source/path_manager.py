@@ -18,6 +18,8 @@ class PathManager:
         nombre de la segunda variable (tal como aparece en el archivo)
     var_format : str
         formato con la cantidad de decimales para el valor de cada variable
+    var_strings : dict
+        valores de las variables ya convertidos a string, indexados por su valor numérico
     
     METODOS
     -------
@@ -43,6 +45,7 @@ class PathManager:
         self.var1_name = names["variable_1"]
         self.var2_name = names["variable_2"]
         self.var_format = names["format"]
+        self.var_strings = {}
 
         self.structure = names["structure"]
         self.output_img = names["output_image"]
@@ -68,25 +71,23 @@ class PathManager:
         Path completo del archivo.
         """
 
-        dir_path = self.dir_prefix + folder + "/"
-        file_name = self.name_prefix + self.var1_name + self.var_to_str(var1)
-        file_name += self.var2_name + self.var_to_str(var2)
-
-        return dir_path + file_name
+        return (f"{self.dir_prefix}{folder}/"
+                f"{self.name_prefix}{self.var1_name}{self.var_to_str(var1)}"
+                f"{self.var2_name}{self.var_to_str(var2)}")
 
 
     def get_folder_path(self, folder: str) -> str:
         """
         Genera el path de la carpeta con la condición inicial 'folder' (sufijo)
         """
-        return self.dir_prefix + folder + "/"
+        return f"{self.dir_prefix}{folder}/"
 
 
     def get_min_path(self) -> str:
         """
         Genera el path de la carpeta que contendrá los archivos de mínima energía
         """
-        return self.dir_prefix + "min_files/"
+        return f"{self.dir_prefix}min_files/"
 
 
     def var_to_str(self, var: float) -> str:
@@ -103,5 +104,9 @@ class PathManager:
         Representación en string del valor formateado según 'var_format',
         corresponderá al valor de la variable en el nombre del archivo.
         """
+        # Los mismos valores se repiten en toda la grilla, por lo que guardamos
+        # cada string generado
+        if var not in self.var_strings:
+            self.var_strings[var] = self.var_format.format(var)
 
-        return self.var_format.format(var)
+        return self.var_strings[var]
@@ -4,6 +4,7 @@ Contiene la clase Plotter
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 
 from path_manager import PathManager
 
@@ -19,13 +20,19 @@ class Plotter:
         lista con todos los valores tomados por la primera variable
     var2_list : list 
         lista con todos los valores tomados por la segunda variable
+    dx, dy : float
+        mitad del paso de la segunda y primera variable respectivamente
+    extent : list
+        límites del gráfico, de modo que cada pixel quede centrado en su valor var1, var2
     data: np.array
-        array de N*M*3 con los valores de color del diagrama de fases
+        array de N*M con el índice en palette del color de cada pixel del diagrama de fases
+    palette : list
+        lista con los colores RGB de cada fase
 
     METODOS:
     --------
-    same_color(a,b) : bool
-        determina si los colores a y b son los mismos
+    get_boundaries() : np.array
+        Genera los segmentos que separan las distintas fases
     plot_phase_diagram() :
         Genera el gráfico del diagrama de fases
     """
@@ -38,34 +45,62 @@ class Plotter:
 
         self.path_manager = path_manager
 
-        self.var1_list = variables["first"]
-        self.var2_list = variables["second"]
+        self.var1_list = np.asarray(variables["first"])
+        self.var2_list = np.asarray(variables["second"])
 
         self.yticks_step = ticks_steps["first"]
         self.xticks_step = ticks_steps["second"]
 
-        self.data = np.zeros([len(variables["first"]), len(variables["second"]), 3])
+        # configuramos el gráfico para que los tics queden en medio de cada valor var1, var2
+        self.dx = (self.var2_list[1]-self.var2_list[0])/2.
+        self.dy = (self.var1_list[1]-self.var1_list[0])/2.
+
+        self.extent = [
+            self.var2_list[0]-self.dx,
+            self.var2_list[-1]+self.dx,
+            self.var1_list[0]-self.dy,
+            self.var1_list[-1]+self.dy
+            ]
 
+        self.palette = []
+        self.data = np.zeros([len(variables["first"]), len(variables["second"])], dtype=np.int8)
 
-    def same_color(self, a, b) -> bool:
-        """
-        Compara dos colores y determina si son iguales.
 
-        Parámetros
-        ----------
-        a : list o array-like
-            Primer color a comparar.
-        b : list o array-like
-            Segundo color a comparar.
+    def get_boundaries(self) -> np.array:
+        """
+        Determina los segmentos que separan pixeles adyacentes de distinto color
+        en el diagrama de fases.
 
         Retorno
         -------
-        bool
-            True si ambos colores son iguales, False en caso contrario.
+        np.array
+            array de S*2*2 con los extremos ((x0, y0), (x1, y1)) de cada segmento,
+            primero las lineas horizontales y luego las verticales.
         """
-        if a[0]==b[0] and a[1]==b[1] and a[2]==b[2]:
-            return True
-        return False
+        var1, var2 = self.var1_list, self.var2_list
+        dx, dy = self.dx, self.dy
+
+        # Para cada pixel, revisaremos si algún pixel adyacente es de otro color,
+        # en cuyo caso habrá una linea en el diagrama de fases.
+        # Lineas horizontales (limite al variar j): colores distintos entre j y j+1
+        h_js, h_ks = np.nonzero(self.data[:-1] != self.data[1:])
+        # Lineas verticales (limite al variar k): colores distintos entre k y k+1
+        v_js, v_ks = np.nonzero(self.data[:, :-1] != self.data[:, 1:])
+
+        # Construimos todos los segmentos de una vez
+        js = np.concatenate([h_js, v_js])
+        ks = np.concatenate([h_ks, v_ks])
+        is_horizontal = np.arange(js.size) < h_js.size
+
+        x_start = np.where(is_horizontal, var2[ks] - dx, var2[ks] + dx)
+        y_start = np.where(is_horizontal, var1[js] + dy, var1[js] - dy)
+        x_end = var2[ks] + dx
+        y_end = var1[js] + dy
+
+        return np.stack([
+            np.stack([x_start, y_start], axis=1),
+            np.stack([x_end, y_end], axis=1),
+            ], axis=1)
 
 
     def plot_phase_diagram(self):
@@ -76,42 +111,13 @@ class Plotter:
         Este método configura los ejes, genera líneas para delimitar las fases
         y muestra el gráfico resultante.
         """
-        # configuramos el gráfico para que los tics queden en medio de cada valor var1, var2
-        dx = (self.var2_list[1]-self.var2_list[0])/2.
-        dy = (self.var1_list[1]-self.var1_list[0])/2.
-
-        extent = [
-            self.var2_list[0]-dx,
-            self.var2_list[-1]+dx,
-            self.var1_list[0]-dy,
-            self.var1_list[-1]+dy
-            ]
+        segments = self.get_boundaries()
 
-        # guardamos en una lista las lineas que delimitarán las distintas
-        # fases del diagrama
-        x_lines, y_lines = [], []
+        # Graficamos, reconstruyendo los colores RGB a partir de la paleta
+        rgb = np.asarray(self.palette)[self.data]
 
-        # Para cada pixel, revisaremos si algún pixel adyacente es de otro color,
-        # en cuyo caso habrá una linea en el diagrama de fases
-        for j, var1 in enumerate(self.var1_list):
-            for k, var2 in enumerate(self.var2_list):
-                # Lineas horizontales (limite al variar j), hay una linea si no corresponde
-                # a un borde y hay 2 colores adyacentes
-                if j!=len(self.var1_list) - 1:
-                    if not self.same_color(self.data[j][k], self.data[j+1][k]):
-                        x_lines.append((var2 - dx, var2 + dx))
-                        y_lines.append((var1 + dy, var1 + dy))
-
-                # Lineas verticales (limite al variar k), hay una linea si no corresponde
-                # a un borde y hay 2 colores adyacentes
-                if k!=len(self.var2_list) - 1:
-                    if not self.same_color(self.data[j][k], self.data[j][k+1]):
-                        x_lines.append((self.var2_list[k] + dx, self.var2_list[k] + dx))
-                        y_lines.append((self.var1_list[j] - dy, self.var1_list[j] + dy))
-
-        # Graficamos
         plt.figure(figsize=(15,9))
-        plt.imshow(self.data[::-1], cmap='hot', interpolation='none', extent=extent)
+        plt.imshow(rgb, origin='lower', cmap='hot', interpolation='none', extent=self.extent)
 
         # Colocamos los labels de los ejes
         label_x = self.path_manager.var2_name[1:] + " [meV]"
@@ -119,13 +125,12 @@ class Plotter:
         plt.xlabel(label_x)
         plt.ylabel(label_y)
 
-        plt.xticks(self.var2_list * self.xticks_step)
-        plt.yticks(self.var1_list * self.yticks_step)
+        plt.xticks(self.var2_list[::self.xticks_step])
+        plt.yticks(self.var1_list[::self.yticks_step])
 
         plt.grid(color='gray', linestyle='--', linewidth=1)
 
         # Añadimos lineas negras separando diferentes fases
-        for (x, y) in zip(x_lines, y_lines):
-            plt.plot(x, y, color="black")
+        plt.gca().add_collection(LineCollection(segments, colors="black"))
 
         plt.savefig("out.png")